@@ -29,27 +29,80 @@
 
 __version__ = '0.9.dev0'
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-import json
+from functools import lru_cache
+import io
 import logging
-import os
+import re
 import requests
-from typing import Generator, Union
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from typing import IO, Generator, Union
+from urllib3.util.retry import Retry
 
-from bs4 import BeautifulSoup
-import click
 from lxml import etree
 
-from pyoscar import cli_options
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 LOGGER = logging.getLogger(__name__)
 
+FACILITY_TYPES = (
+    'seaMobile',
+    'underwaterFixed',
+    'underwaterMobile',
+    'airMobile',
+    'lakeRiverMobile',
+    'seaOnIce',
+    'landMobile',
+    'landFixed',
+    'lakeRiverFixed',
+    'seaFixed',
+    'airFixed',
+    'landOnIce'
+)
+
+_FACILITY_TYPES_SET = frozenset(FACILITY_TYPES)
+
+NAMESPACES = {
+    'wmdr': 'http://def.wmo.int/wmdr/2017',
+    'gml': 'http://www.opengis.net/gml/3.2',
+    'oai': 'http://www.openarchives.org/OAI/2.0/',
+    'xlink': 'http://www.w3.org/1999/xlink'
+}
+
+_OAI_RECORD_TAG = f"{{{NAMESPACES['oai']}}}record"
+_OAI_RESUMPTION_TOKEN_START = re.compile(
+    rb'<(?:[\w.-]+:)?resumptionToken[\s/>]')
+# the token element is parsed on its own, so a namespace prefix declared
+# on an ancestor is unbound and has to be tolerated
+_OAI_RESUMPTION_TOKEN_PARSER = etree.XMLParser(recover=True)
+
+_OAI_RECORD_IDENTIFIER = etree.XPath(
+    'string(oai:header/oai:identifier)', namespaces=NAMESPACES,
+    smart_strings=False)
+_OAI_RECORD_METADATA = etree.XPath(
+    'oai:metadata/wmdr:WIGOSMetadataRecord', namespaces=NAMESPACES)
+
+# clients returned by OSCARClient.shared, keyed on their arguments
+_SHARED_CLIENTS = {}
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+_FLOAT_VALUE = re.compile(r'[-+]?(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_INT_VALUE = re.compile(r'[-+]?\d+')
+
 
 class OSCARClient:
     """OSCAR client API"""
 
     def __init__(self, env: str = 'prod', api_token: str = None,
-                 timeout: int = 30):
+                 timeout: int = 30, cache_ttl: int = 60,
+                 cache_size: int = 256, max_workers: int = 8):
         """
         Initialize an OSCAR Client.
 
@@ -74,6 +127,21 @@ class OSCARClient:
         self.timeout = timeout
         """timeout (seconds)"""
 
+        self.cache_ttl = cache_ttl
+        """time to live of cached responses (seconds, 0 disables caching)"""
+
+        self.cache_size = cache_size
+        """maximum number of cached responses"""
+
+        self._cache = OrderedDict()
+
+        self._cache_lock = threading.Lock()
+
+        self._station_ids = {}
+
+        self.max_workers = max_workers
+        """maximum number of concurrent requests"""
+
         self.headers = {
             'User-Agent': 'pyoscar: https://github.com/wmo-cop/pyoscar'
         }
@@ -91,9 +159,62 @@ class OSCARClient:
         if self.api_token is not None:
             self.headers['X-WMO-WMDR-Token'] = self.api_token
 
+        self.session = requests.Session()
+        """HTTP session (connection pooling and keep-alive)"""
+
+        self.session.headers.update(self.headers)
+
+        retries = Retry(total=3, connect=3, read=3, backoff_factor=0.5,
+                        status_forcelist=[500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4,
+                              pool_maxsize=max(20, self.max_workers),
+                              max_retries=retries)
+        self.session.mount('https://', adapter)
+
+    @classmethod
+    def shared(cls, env: str = 'prod', api_token: str = None,
+               timeout: int = 30) -> 'OSCARClient':
+        """
+        Get a client shared across the process, so that repeated callers
+        reuse its HTTP session, pooled connections and response cache.
+        Shared clients are kept (and their connections held open) for the
+        lifetime of the process.
+
+        :param env: OSCAR environment (prod or depl)
+        :param api_token: authentication token
+        :param timeout: timeout (seconds)
+
+        :returns: `pyoscar.OSCARClient`
+        """
+
+        key = (cls, env, api_token, timeout)
+
+        with _SHARED_CLIENTS_LOCK:
+            if key not in _SHARED_CLIENTS:
+                _SHARED_CLIENTS[key] = cls(env=env, api_token=api_token,
+                                           timeout=timeout)
+
+            return _SHARED_CLIENTS[key]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the HTTP session and its pooled connections
+
+        :returns: `None`
+        """
+
+        self.session.close()
+
     def get_stations(self, program: str = None, country: str = None,
                      station_name: str = None, station_type: str = None,
-                     wigos_id: str = None) -> list:
+                     wigos_id: str = None,
+                     raw: bool = False) -> Union[list, bytes]:
         """
         get all stations
 
@@ -114,8 +235,11 @@ class OSCARClient:
                              - landOnIce
         :param station_name: station name
         :param wigos_id: WIGOS identifier
+        :param raw: whether to return the unparsed JSON response
+                    (default `False`)
 
-        :returns: `list` of all matching stations
+        :returns: `list` of all matching stations, or `bytes` of JSON
+                  response if `raw` is `True`
         """
 
         request = f'{self.api_url}/search/station'
@@ -125,68 +249,162 @@ class OSCARClient:
         params = {}
 
         if wigos_id is not None:
-            LOGGER.debug(f'WIGOS ID: {wigos_id}')
+            LOGGER.debug('WIGOS ID: %s', wigos_id)
             params['wigosId'] = wigos_id
         elif station_name is not None:
             request = f'{self.api_url}/stations/approvedStations/names'
             params['q'] = station_name
         else:
             if program is not None:
-                LOGGER.debug(f'Program: {program}')
+                LOGGER.debug('Program: %s', program)
                 params['programAffiliation'] = program
             if country is not None:
-                LOGGER.debug(f'Country: {program}')
+                LOGGER.debug('Country: %s', country)
                 params['territoryName'] = country
             if station_type is not None:
-                LOGGER.debug(f'Station type: {station_type}')
+                LOGGER.debug('Station type: %s', station_type)
+                if station_type not in _FACILITY_TYPES_SET:
+                    msg = f'Invalid station type: {station_type}'
+                    LOGGER.debug(msg)
+                    raise ValueError(msg)
                 params['facilityType'] = station_type
 
-        response = requests.get(request, headers=self.headers, params=params)
-        LOGGER.debug(f'Request: {response.url}')
-        LOGGER.debug(f'Response: {response.status_code}')
+        response = self._cached_get(request, params)
 
-        return response.json()
+        if raw:
+            return response
+
+        return json_loads(response)
 
     def get_contact(self, country: str, surname: str,
-                    organization: str) -> list:
+                    organization: str, detailed: bool = True) -> list:
         """
         get contact information
 
         :param country: Country name
         :param surname: Surname of contact
         :param organization: Organization of contact
+        :param detailed: whether to fetch the full record of each matching
+                         contact (default `True`), or return the summary
+                         records of the contact listing without further
+                         requests
 
         returns: `list` of matching contacts
         """
 
-        ids = []
-        matches = []
+        contacts = {}
 
         LOGGER.debug('Fetching all contacts')
 
         request = f'{self.api_url}/contacts'
-        response = requests.get(request, headers=self.headers)
-        LOGGER.debug(f'Request: {response.url}')
-        LOGGER.debug(f'Response: {response.status_code}')
-
-        for c in response.json():
-            if country is not None and country.casefold() == c['countryName'].casefold():  # noqa:
-                ids.append(c['id'])
-            if surname is not None and surname.casefold() == c.get('surname', c.get('surnameName')).casefold():  # noqa
-                ids.append(c['id'])
-            if organization is not None and organization.casefold() == c['organization'].casefold():  # noqa
-                ids.append(c['id'])
-
-        for id_ in ids:
-            LOGGER.debug(f'Fetching contact {id_}')
-            request = f'{self.api_url}/contacts/contact/{id_}'
-            response = requests.get(request, headers=self.headers)
-            LOGGER.debug(f'Request: {response.url}')
-            LOGGER.debug(f'Response: {response.status_code}')
-            matches.append(response.json())
+
+        # query values are casefolded once rather than once per contact
+        if country is not None:
+            country = country.casefold()
+        if surname is not None:
+            surname = surname.casefold()
+        if organization is not None:
+            organization = organization.casefold()
+
+        for c in json_loads(self._cached_get(request)):
+            # a contact matching any filter is selected once
+            if ((country is not None and country == c['countryName'].casefold()) or  # noqa
+                    (surname is not None and surname == (c.get('surname') or c.get('surnameName') or '').casefold()) or  # noqa
+                    (organization is not None and organization == c['organization'].casefold())):  # noqa
+                # guard against the listing repeating a contact
+                contacts.setdefault(c['id'], c)
+
+        if not detailed:
+            return list(contacts.values())
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            matches = list(executor.map(self._fetch_contact, contacts))
 
         return matches
 
+    def _cached_get(self, request: str, params: dict = None) -> bytes:
+        """
+        perform an HTTP GET request, serving from the response cache
+        while entries are fresh
+
+        :param request: URL of request
+        :param params: `dict` of query parameters
+
+        :returns: `bytes` of response body
+        """
+
+        if params is None:
+            params = {}
+
+        key = (request, frozenset(params.items()))
+        now = time.monotonic()
+        headers = {}
+
+        # the cache is shared by concurrent requests (get_station_reports)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+
+        if cached is not None:
+            if now - cached[0] < self.cache_ttl:
+                LOGGER.debug('Using cached response for %s', request)
+                return cached[1]
+
+            # revalidate the stale entry rather than refetching it
+            if cached[2] is not None:
+                headers['If-None-Match'] = cached[2]
+            if cached[3] is not None:
+                headers['If-Modified-Since'] = cached[3]
+
+        try:
+            response = self.session.get(request, params=params,
+                                        headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as err:
+            if cached is None:
+                raise
+            LOGGER.warning('Request failed (%s), using stale response', err)
+            return cached[1]
+
+        LOGGER.debug('Request: %s', response.url)
+        LOGGER.debug('Response: %s', response.status_code)
+
+        if cached is not None and response.status_code == 304:
+            LOGGER.debug('Cached response for %s is still valid', request)
+            with self._cache_lock:
+                self._cache[key] = (now,) + cached[1:]
+            return cached[1]
+
+        response.raise_for_status()
+
+        if self.cache_ttl > 0 and response.ok:
+            with self._cache_lock:
+                self._cache[key] = (now, response.content,
+                                    response.headers.get('ETag'),
+                                    response.headers.get('Last-Modified'))
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return response.content
+
+    def _fetch_contact(self, id_: int) -> dict:
+        """
+        fetch a single contact
+
+        :param id_: contact identifier
+
+        :returns: `dict` of contact
+        """
+
+        LOGGER.debug('Fetching contact %s', id_)
+        request = f'{self.api_url}/contacts/contact/{id_}'
+        response = self.session.get(request, timeout=self.timeout)
+        LOGGER.debug('Request: %s', response.url)
+        LOGGER.debug('Response: %s', response.status_code)
+
+        return json_loads(response.content)
+
     def get_station_report(self, identifier: str, summary=False,
                            format_: str = 'JSON') -> Union[dict, etree.Element]:  # noqa
         """
@@ -202,30 +420,46 @@ class OSCARClient:
 
         if format_ == 'XML':
             LOGGER.debug('Trying WIGOS XML download')
-            request = f'{self.harvest_url}?verb=GetRecord&metadataPrefix=wmdr&identifier={identifier}'  # noqa
+            params = {
+                'verb': 'GetRecord',
+                'metadataPrefix': 'wmdr',
+                'identifier': identifier
+            }
+
+            # parse the record while it is being downloaded
+            response = self.session.get(self.harvest_url, params=params,
+                                        timeout=self.timeout, stream=True)
+            LOGGER.debug('Request: %s', response.url)
+            LOGGER.debug('Response: %s', response.status_code)
+
+            try:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                root = etree.parse(response.raw).getroot()
+            finally:
+                response.close()
+
+            response = root
         else:
-            LOGGER.debug(f'Searching stations for WIGOS ID: {identifier}')
-            response = self.get_stations(wigos_id=identifier)
-            if not response or response['totalCount'] == 0:
-                msg = f'Station {identifier} not found'
-                LOGGER.debug(msg)
-                raise RuntimeError(msg)
+            station_id = self._station_ids.get(identifier)
 
-            identifier = str(response['stationSearchResults'][0]['id'])
+            if station_id is None:
+                LOGGER.debug('Searching stations for WIGOS ID: %s', identifier)
+                response = self.get_stations(wigos_id=identifier)
+                if not response or response['totalCount'] == 0:
+                    msg = f'Station {identifier} not found'
+                    LOGGER.debug(msg)
+                    raise RuntimeError(msg)
 
-            LOGGER.debug(f'Fetching station report {identifier}')
-            request = f'{self.api_url}/stations/station/{identifier}/stationReport'  # noqa
+                station_id = str(response['stationSearchResults'][0]['id'])
+                self._station_ids[identifier] = station_id
 
-        response = requests.get(request, headers=self.headers)
-        LOGGER.debug(f'Request: {response.url}')
-        LOGGER.debug(f'Response: {response.status_code}')
+            identifier = station_id
 
-        response.raise_for_status()
+            LOGGER.debug('Fetching station report %s', identifier)
+            request = f'{self.api_url}/stations/station/{identifier}/stationReport'  # noqa
 
-        if format_ == 'XML':
-            response = etree.fromstring(response.content)
-        else:
-            response = response.json()
+            response = json_loads(self._cached_get(request))
 
         if summary:
             LOGGER.debug('Generating report summary')
@@ -233,6 +467,27 @@ class OSCARClient:
         else:
             return response
 
+    def get_station_reports(self, identifiers: list, summary=False,
+                            format_: str = 'JSON') -> list:
+        """
+        get station information for multiple WIGOS identifiers, fetching
+        up to `max_workers` reports concurrently
+
+        :param identifiers: `list` of identifiers (WIGOS identifiers)
+        :param summary: whether to provide summary reports (default `False`)
+        :param format_: format (JSON [default] or XML)
+
+        :returns: `list` of station reports (see `get_station_report`),
+                  in the order of `identifiers`
+        """
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            reports = list(executor.map(
+                lambda identifier: self.get_station_report(
+                    identifier, summary, format_), identifiers))
+
+        return reports
+
     def get_station_report_summary(self, station: Union[dict, etree.Element]) -> dict:  # noqa
         """
         Provide station summary report
@@ -261,14 +516,18 @@ class OSCARClient:
                 LOGGER.warning(error)
                 return {}
 
-            station_name = get_xpath(
-                station, '//wmdr:ObservingFacility/gml:name')
+            # locate the facility once and query its properties from there
+            # rather than searching the whole record for each of them
+            facility = get_xpath(station, '//wmdr:ObservingFacility',
+                                 first=False)[0]
+
+            station_name = get_xpath(facility, 'gml:name')
 
             wigos_station_identifier = get_xpath(
-                station, '//wmdr:ObservingFacility/gml:identifier').split(',')[0]  # noqa
+                facility, 'gml:identifier').split(',')[0]
 
             facility_type = get_xpath(
-                station, '//wmdr:ObservingFacility//wmdr:facilityType/@xlink:href')  # noqa
+                facility, './/wmdr:facilityType/@xlink:href')
 
             if not facility_type:
                 facility_type = None
@@ -276,7 +535,7 @@ class OSCARClient:
                 facility_type = facility_type.split('/')[-1]
 
             wmo_region = get_xpath(
-                station, '//wmdr:ObservingFacility//wmdr:wmoRegion/@xlink:href')  # noqa
+                facility, './/wmdr:wmoRegion/@xlink:href')
 
             if not wmo_region:
                 wmo_region = None
@@ -284,7 +543,7 @@ class OSCARClient:
                 wmo_region = wmo_region.split('/')[-1]
 
             territory_name = get_xpath(
-                station, '//wmdr:ObservingFacility//wmdr:territoryName/@xlink:href')  # noqa
+                facility, './/wmdr:territoryName/@xlink:href')
 
             if not territory_name:
                 territory_name = None
@@ -298,7 +557,7 @@ class OSCARClient:
             summary['territory_name'] = territory_name
 
             geometry = get_xpath(
-                station, '//wmdr:ObservingFacility//wmdr:geoLocation//gml:pos')
+                facility, './/wmdr:geoLocation//gml:pos')
 
             if geometry is None:
                 LOGGER.debug('No facility geometry found')
@@ -324,61 +583,92 @@ class OSCARClient:
 
         return summary
 
-    def harvest_records(self,
-                        date_from: date = None) -> Generator[list, None, None]:
+    def harvest_records(self, date_from: date = None,
+                        date_until: date = None) -> Generator[
+            tuple, None, None]:
         """
         harvest contents of OSCAR/Surface
 
+        The next page of the OAI-PMH response is fetched in the
+        background while records of the current page are being consumed.
+        A yielded record is cleared once the next record is requested,
+        so it must be consumed (or copied) before advancing.
+
         :param date_from: `date` of records modified since
+        :param date_until: `date` of records modified until
 
-        :returns: `generator` of `lxml.etree._Element` objects
+        :returns: `generator` of (`str` identifier,
+                  `lxml.etree._Element` record) tuples
         """
 
-        oai_ns = 'http://www.openarchives.org/OAI/2.0/'
-        wmdr_ns = 'http://def.wmo.int/wmdr/2017'
+        params = {
+            'verb': 'ListRecords',
+            'metadataPrefix': 'wmdr'
+        }
 
-        stop_harvest = False
-        resumption_token = None
+        if date_from is not None:
+            params['from'] = date_from.strftime('%Y-%m-%d')
+        if date_until is not None:
+            params['until'] = date_until.strftime('%Y-%m-%d')
 
-        while not stop_harvest:
-            request = f'{self.harvest_url}?verb=ListRecords'
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = executor.submit(self._fetch_harvest_page, params)
 
-            if resumption_token is not None:
-                request = f'{request}&resumptionToken={resumption_token}'
-            else:
-                request = f'{request}&metadataPrefix=wmdr'
+            while page is not None:
+                content = page.result()
 
-                if date_from is not None:
-                    request = f"{request}&{date_from.strftime('%Y-%m-%d')}"
+                resumption_token = get_resumption_token(content)
 
-            response = requests.get(request, headers=self.headers)
-            LOGGER.debug(f'Request: {response.url}')
-            LOGGER.debug(f'Response: {response.status_code}')
+                if resumption_token:
+                    LOGGER.debug('resumption token: %s', resumption_token)
+                    params = {
+                        'verb': 'ListRecords',
+                        'resumptionToken': resumption_token
+                    }
+                    page = executor.submit(self._fetch_harvest_page, params)
+                else:
+                    LOGGER.debug('stopping harvesting')
+                    page = None
 
-            xml = etree.fromstring(response.text).getroot()
-            LOGGER.debug(f'Raw XML response:\n{response.text}')
-            element = f'{{{oai_ns}}}ListRecords/{{{oai_ns}}}resumptionToken'
-            rt = xml.find(element)
+                context = etree.iterparse(io.BytesIO(content),
+                                          tag=_OAI_RECORD_TAG)
 
-            if rt is not None:
-                LOGGER.debug(f'resumption token: {rt.text}')
-                resumption_token = rt.text
-            else:
-                LOGGER.debug('stopping harvesting')
-                stop_harvest = True
+                for event, element in context:
+                    records = _OAI_RECORD_METADATA(element)
 
-            records = f'{{{oai_ns}}}ListRecords/{{{oai_ns}}}record/{{{oai_ns}}}metadata/{{{wmdr_ns}}}WIGOSMetadataRecord'  # noqa
+                    # deleted records have a header but no metadata
+                    if records:
+                        yield _OAI_RECORD_IDENTIFIER(element), records[0]
 
-            identifiers = f'{{{oai_ns}}}ListRecords/{{{oai_ns}}}record/{{{oai_ns}}}header/{{{oai_ns}}}identifier'  # noqa
+                    element.clear(keep_tail=True)
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
 
-            yield zip([i.text for i in xml.findall(identifiers)],
-                      xml.findall(records))
+    def _fetch_harvest_page(self, params: dict) -> bytes:
+        """
+        fetch a single page of OAI-PMH ListRecords
+
+        :param params: `dict` of OAI-PMH request parameters
 
-    def upload(self, xml_data: str, only_use_gml_ids: bool = True) -> dict:
+        :returns: `bytes` of response body
+        """
+
+        response = self.session.get(self.harvest_url, params=params,
+                                    timeout=self.timeout)
+        LOGGER.debug('Request: %s', response.url)
+        LOGGER.debug('Response: %s', response.status_code)
+
+        response.raise_for_status()
+
+        return response.content
+
+    def upload(self, xml_data: Union[str, bytes, IO],
+               only_use_gml_ids: bool = True) -> dict:
         """
         upload WMDR XML to OSCAR M2M API
 
-        :param xml: `str` of XML
+        :param xml_data: `str` or `bytes` of XML, or file-like object
+                         (streamed)
         :param only_use_gml_ids: `bool` of whether to enforce matching
                                  gml:id for supporting elements
 
@@ -387,7 +677,7 @@ class OSCARClient:
 
         use_only_gml_ids_str = str(only_use_gml_ids).upper()
 
-        LOGGER.debug(f'useOnlyGmlIds: {use_only_gml_ids_str}')
+        LOGGER.debug('useOnlyGmlIds: %s', use_only_gml_ids_str)
 
         params = {
             'useOnlyGmlIds': use_only_gml_ids_str
@@ -395,20 +685,35 @@ class OSCARClient:
 
         url = f'{self.api_url}/wmd/upload'
 
-        response = requests.post(url, headers=self.headers, data=xml_data,
-                                 params=params)
+        headers = {
+            'Content-Type': 'application/xml'
+        }
+
+        response = self.session.post(url, data=xml_data, params=params,
+                                     headers=headers, timeout=self.timeout)
 
         if response.status_code != requests.codes.ok:
             LOGGER.debug(response.status_code)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            err = soup.find_all(id='standardLayouterror')[0].get_text()
+            # deferred import: only needed on the error path
+            from lxml import html
+
+            try:
+                node = html.fromstring(response.content).get_element_by_id(
+                    'standardLayouterror', None)
+            except etree.ParserError:  # empty, blank or comment-only body
+                node = None
+
+            if node is not None:
+                err = node.text_content()
+            else:  # not the expected error page
+                err = response.text[:500]
 
             return {
                 'code': response.status_code,
                 'description': err
             }
 
-        return response.json()
+        return json_loads(response.content)
 
 
 def get_xpath(element: etree.Element, xpath: str,
@@ -423,21 +728,14 @@ def get_xpath(element: etree.Element, xpath: str,
     :returns: value of matching XPath(s)
     """
 
-    namespaces = {
-        'wmdr': 'http://def.wmo.int/wmdr/2017',
-        'gml': 'http://www.opengis.net/gml/3.2',
-        'oai': 'http://www.openarchives.org/OAI/2.0/',
-        'xlink': 'http://www.w3.org/1999/xlink'
-    }
-
-    LOGGER.debug(f'Searching for xpath {xpath}')
-    value = element.xpath(xpath, namespaces=namespaces)
+    LOGGER.debug('Searching for xpath %s', xpath)
+    value = _compile_xpath(xpath)(element)
 
     if not first:
         LOGGER.debug('Returning all matching nodes')
         return value
 
-    LOGGER.debug(f'Value: {value}')
+    LOGGER.debug('Value: %s', value)
 
     if len(value) == 0:
         LOGGER.debug('No matches')
@@ -452,208 +750,69 @@ def get_xpath(element: etree.Element, xpath: str,
         return value.text
 
 
-def get_typed_value(value) -> Union[float, int, str]:
+@lru_cache(maxsize=64)
+def _compile_xpath(xpath: str) -> etree.XPath:
     """
-    Derive true type from data value
+    Helper function to compile (once) a given XPath expression
 
-    :param value: value
+    :param xpath: `str` of valid W3C XPath expression
 
-    :returns: value as a native Python data type
+    :returns: `etree.XPath` bound to `NAMESPACES`
     """
 
-    try:
-        if '.' in value:  # float?
-            value2 = float(value)
-        elif len(value) > 1 and value.startswith('0'):
-            value2 = value
-        else:  # int?
-            value2 = int(value)
-    except ValueError:  # string (default)?
-        value2 = value
-
-    return value2
-
-
-class RequestError(Exception):
-    """class exception stub"""
-    pass
-
-
-@click.group()
-@click.version_option(version=__version__)
-def cli():
-    pass
-
-
-@click.command()
-@click.pass_context
-@cli_options.OPTION_COUNTRY
-@cli_options.OPTION_ENV
-@cli_options.OPTION_VERBOSITY
-@click.option('--surname', '-s', help='Surname')
-@click.option('--organization', '-o', help='Organization')
-def contact(ctx, env, country=None, surname=None, organization=None,
-            verbosity=None):
-    """get contact information"""
+    return etree.XPath(xpath, namespaces=NAMESPACES)
 
-    if all([country is None, surname is None, organization is None]):
-        raise click.ClickException(
-            'one of --country/-c, --surname/-s or --organization/-o required')
 
-    if verbosity is not None:
-        logging.basicConfig(level=getattr(logging, verbosity))
-    else:
-        logging.getLogger(__name__).addHandler(logging.NullHandler())
-
-    o = OSCARClient(env=env)
-
-    response = json.dumps(o.get_contact(country, surname, organization),
-                          indent=4)
-
-    click.echo(response)
-
-
-@click.command()
-@click.pass_context
-@cli_options.OPTION_ENV
-@cli_options.OPTION_VERBOSITY
-@click.argument('identifier')
-@click.option('--summary', '-s', 'summary', is_flag=True, default=False,
-              help='Provide summary report')
-@click.option('--format', '-f', 'format_', type=click.Choice(['JSON', 'XML']),
-              default='JSON', help='Format')
-def station(ctx, env, identifier, summary=False, format_='JSON',
-            verbosity=None):
-    """get station report"""
-
-    if identifier is None:
-        raise click.ClickException(
-            'WIGOS identifier is a required parameter (-i)')
-
-    if verbosity is not None:
-        logging.basicConfig(level=getattr(logging, verbosity))
-    else:
-        logging.getLogger(__name__).addHandler(logging.NullHandler())
-
-    o = OSCARClient(env=env)
-
-    try:
-        response = o.get_station_report(identifier, summary, format_)
-    except RuntimeError as err:
-        raise click.ClickException(err)
-
-    if summary:
-        click.echo(json.dumps(response, indent=4))
-        return
-
-    if format_ == 'XML':
-        response = etree.tostring(response, pretty_print=1)
-    else:
-        response = json.dumps(response, indent=4)
-
-    click.echo(response)
+def get_resumption_token(content: bytes) -> Union[str, None]:
+    """
+    Helper function to find the resumption token of an OAI-PMH
+    ListRecords response
 
+    :param content: `bytes` of OAI-PMH response
 
-@click.command('stations')
-@click.pass_context
-@cli_options.OPTION_COUNTRY
-@cli_options.OPTION_ENV
-@cli_options.OPTION_VERBOSITY
-@click.option('--program', '-p', help='Program Affiliation')
-@click.option('--station-name', '-sn', help='Station name')
-@click.option('--station-type', '-st', help='Station type')
-def stations(ctx, env, program=None, country=None, station_name=None,
-             station_type=None, verbosity=None):
-    """get list of OSCAR stations"""
+    :returns: `str` of resumption token, or `None` if this is the last page
+    """
 
-    if verbosity is not None:
-        logging.basicConfig(level=getattr(logging, verbosity))
+    # the token follows the records, so only the tail of the page is parsed
+    end = content.rfind(b'resumptionToken')
+    pos = end
+    while pos != -1:
+        start = content.rfind(b'<', 0, pos)
+        if start != -1 and _OAI_RESUMPTION_TOKEN_START.match(content, start):
+            break
+        pos = content.rfind(b'resumptionToken', 0, pos)
     else:
-        logging.getLogger(__name__).addHandler(logging.NullHandler())
-
-    o = OSCARClient(env=env)
-    matching_stations = o.get_stations(station_name=station_name,
-                                       program=program, country=country)
-
-    result = json.dumps(matching_stations, indent=4)
-    click.echo(f'Number of stations: {len(matching_stations)}\nStations:\n{result}')  # noqa
-
-
-@click.command()
-@click.pass_context
-@cli_options.OPTION_ENV
-@cli_options.OPTION_LOG
-@cli_options.OPTION_VERBOSITY
-@click.option('--api-token', '-at', 'api_token', help='API token')
-@click.option('--xml', '-x', help='WMDR XML')
-@click.option('--gml-ids/--no-gml-ids', default=True, help='use GML ids')
-def upload(ctx, api_token, env, xml, log, gml_ids=True,
-           verbosity=None):
-    """upload WMDR XML"""
-
-    if verbosity is not None:
-        logging.basicConfig(level=getattr(logging, verbosity))
-    else:
-        logging.getLogger(__name__).addHandler(logging.NullHandler())
-
-    if xml is None:
-        raise click.ClickException('--xml/-x required')
+        return None
 
-    if api_token is None:
-        raise click.ClickException('--api-token/-at required')
+    element = etree.fromstring(content[start:content.find(b'>', end) + 1],
+                               _OAI_RESUMPTION_TOKEN_PARSER)
 
-    o = OSCARClient(api_token=api_token, env=env)
+    token = (element.text or '').strip()
+    return token or None
 
-    click.echo(f'Sending {xml} to OSCAR {env} environment ({o.api_url})')
 
-    with open(xml) as fh:
-        data = fh.read()
+def get_typed_value(value) -> Union[float, int, str]:
+    """
+    Derive true type from data value
 
-    response = o.upload(data, only_use_gml_ids=gml_ids)
+    :param value: value
 
-    response_str = json.dumps(response, indent=4)
+    :returns: value as a native Python data type
+    """
 
-    if log is None:
-        click.echo(response_str)
-    else:
-        log.write(response_str + '\n')
-
-
-@click.command()
-@click.pass_context
-@cli_options.OPTION_ENV
-@cli_options.OPTION_LOG
-@cli_options.OPTION_VERBOSITY
-@click.option('--from', '-f', 'from_',
-              help='Harvest records from a given date (YYYY-MM-DD)')
-@click.option('--directory', '-d',
-              type=click.Path(file_okay=False, writable=True),
-              help='Output directory to save records')
-def harvest(ctx, directory, env, from_, log, verbosity=None):
-    """harvest OSCAR records"""
-
-    if directory is None:
-        raise click.ClickException('--directory/-d not specified')
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-    if verbosity is not None:
-        logging.basicConfig(level=getattr(logging, verbosity))
-    else:
-        logging.getLogger(__name__).addHandler(logging.NullHandler())
+    if not isinstance(value, str):  # already typed
+        return value
 
-    o = OSCARClient(env=env)
+    if _FLOAT_VALUE.fullmatch(value):
+        return float(value)
+    elif len(value) > 1 and value.startswith('0'):
+        return value
+    elif _INT_VALUE.fullmatch(value):
+        return int(value)
 
-    click.echo('Harvesting records')
-    for batch in o.harvest_records(from_):
-        for identifier, record in batch:
-            filename = f'{directory}/{identifier}.xml'
-            click.echo(f'saving to {filename}')
-            with open(filename, 'wb') as fh:
-                fh.write(etree.tostring(record))
+    return value  # string (default)
 
 
-cli.add_command(contact)
-cli.add_command(harvest)
-cli.add_command(station)
-cli.add_command(stations)
-cli.add_command(upload)
+class RequestError(Exception):
+    """class exception stub"""
+    pass
@@ -0,0 +1,265 @@
+# =================================================================
+#
+# Authors: Tom Kralidis <tomkralidis@gmail.com>
+#
+# Copyright (c) 2024 Tom Kralidis
+#
+# Permission is hereby granted, free of charge, to any person
+# obtaining a copy of this software and associated documentation
+# files (the "Software"), to deal in the Software without
+# restriction, including without limitation the rights to use,
+# copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following
+# conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+# =================================================================
+
+import json
+import os
+
+import click
+from lxml import etree
+
+from pyoscar import __version__, cli_options, FACILITY_TYPES, OSCARClient
+
+
+@click.group()
+@click.version_option(version=__version__)
+def cli():
+    pass
+
+
+def get_client(ctx: click.Context, **kwargs) -> OSCARClient:
+    """
+    Helper function to create an OSCAR client whose HTTP session is
+    closed when the command exits
+
+    :param ctx: `click.Context` of command
+    :param kwargs: keyword arguments passed to `pyoscar.OSCARClient`
+
+    :returns: `pyoscar.OSCARClient`
+    """
+
+    client = OSCARClient(**kwargs)
+    ctx.call_on_close(client.close)
+
+    return client
+
+
+@click.command()
+@click.pass_context
+@cli_options.OPTION_CONCURRENCY
+@cli_options.OPTION_COUNTRY
+@cli_options.OPTION_ENV
+@cli_options.OPTION_VERBOSITY
+@click.option('--surname', '-s', help='Surname')
+@click.option('--organization', '-o', help='Organization')
+@click.option('--detailed/--no-detailed', default=True,
+              help='Fetch the full record of each contact')
+def contact(ctx, env, country=None, surname=None, organization=None,
+            detailed=True, concurrency=8, verbosity=None):
+    """get contact information"""
+
+    if all([country is None, surname is None, organization is None]):
+        raise click.ClickException(
+            'one of --country/-c, --surname/-s or --organization/-o required')
+
+    o = get_client(ctx, env=env, max_workers=concurrency)
+
+    response = json.dumps(o.get_contact(country, surname, organization,
+                                        detailed=detailed), indent=4)
+
+    click.echo(response)
+
+
+@click.command()
+@click.pass_context
+@cli_options.OPTION_ENV
+@cli_options.OPTION_VERBOSITY
+@click.argument('identifier')
+@click.option('--summary', '-s', 'summary', is_flag=True, default=False,
+              help='Provide summary report')
+@click.option('--format', '-f', 'format_', type=click.Choice(['JSON', 'XML']),
+              default='JSON', help='Format')
+def station(ctx, env, identifier, summary=False, format_='JSON',
+            verbosity=None):
+    """get station report"""
+
+    if identifier is None:
+        raise click.ClickException(
+            'WIGOS identifier is a required parameter (-i)')
+
+    o = get_client(ctx, env=env)
+
+    try:
+        response = o.get_station_report(identifier, summary, format_)
+    except RuntimeError as err:
+        raise click.ClickException(err)
+
+    if summary:
+        click.echo(json.dumps(response, indent=4))
+        return
+
+    if format_ == 'XML':
+        response = etree.tostring(response, pretty_print=1)
+    else:
+        response = json.dumps(response, indent=4)
+
+    click.echo(response)
+
+
+@click.command('station-reports')
+@click.pass_context
+@cli_options.OPTION_CONCURRENCY
+@cli_options.OPTION_ENV
+@cli_options.OPTION_VERBOSITY
+@click.option('--identifier', '-i', 'identifiers', multiple=True,
+              help='WIGOS identifier (can be repeated)')
+@click.option('--file', '-fi', 'file_', type=click.File(),
+              help='File of WIGOS identifiers (one per line)')
+@click.option('--summary', '-s', 'summary', is_flag=True, default=False,
+              help='Provide summary reports')
+def station_reports(ctx, env, identifiers, file_=None, summary=False,
+                    concurrency=8, verbosity=None):
+    """get station reports of multiple stations"""
+
+    identifiers = list(identifiers)
+    if file_ is not None:
+        identifiers.extend(line.strip() for line in file_ if line.strip())
+
+    if not identifiers:
+        raise click.ClickException('--identifier/-i or --file/-fi required')
+
+    o = get_client(ctx, env=env, max_workers=concurrency)
+
+    try:
+        response = o.get_station_reports(identifiers, summary)
+    except RuntimeError as err:
+        raise click.ClickException(err)
+
+    click.echo(json.dumps(response, indent=4))
+
+
+@click.command('stations')
+@click.pass_context
+@cli_options.OPTION_COUNTRY
+@cli_options.OPTION_ENV
+@cli_options.OPTION_VERBOSITY
+@click.option('--program', '-p', help='Program Affiliation')
+@click.option('--station-name', '-sn', help='Station name')
+@click.option('--station-type', '-st', type=click.Choice(FACILITY_TYPES),
+              help='Station type')
+@click.option('--raw', '-r', is_flag=True, default=False,
+              help='Output the OSCAR response as is')
+def stations(ctx, env, program=None, country=None, station_name=None,
+             station_type=None, raw=False, verbosity=None):
+    """get list of OSCAR stations"""
+
+    o = get_client(ctx, env=env)
+
+    if raw:
+        click.echo(o.get_stations(station_name=station_name, program=program,
+                                  country=country, station_type=station_type,
+                                  raw=True))
+        return
+
+    matching_stations = o.get_stations(station_name=station_name,
+                                       program=program, country=country,
+                                       station_type=station_type)
+
+    # search results are paged, with the overall count alongside
+    if isinstance(matching_stations, dict):
+        count = matching_stations.get('totalCount', 0)
+    else:
+        count = len(matching_stations)
+
+    result = json.dumps(matching_stations, indent=4)
+    click.echo(f'Number of stations: {count}\nStations:\n{result}')
+
+
+@click.command()
+@click.pass_context
+@cli_options.OPTION_ENV
+@cli_options.OPTION_LOG
+@cli_options.OPTION_VERBOSITY
+@click.option('--api-token', '-at', 'api_token', help='API token')
+@click.option('--xml', '-x', help='WMDR XML')
+@click.option('--gml-ids/--no-gml-ids', default=True, help='use GML ids')
+def upload(ctx, api_token, env, xml, log, gml_ids=True,
+           verbosity=None):
+    """upload WMDR XML"""
+
+    if xml is None:
+        raise click.ClickException('--xml/-x required')
+
+    if api_token is None:
+        raise click.ClickException('--api-token/-at required')
+
+    o = get_client(ctx, api_token=api_token, env=env)
+
+    click.echo(f'Sending {xml} to OSCAR {env} environment ({o.api_url})')
+
+    with open(xml, 'rb') as fh:
+        response = o.upload(fh, only_use_gml_ids=gml_ids)
+
+    response_str = json.dumps(response, indent=4)
+
+    if log is None:
+        click.echo(response_str)
+    else:
+        log.write(response_str + '\n')
+
+
+@click.command()
+@click.pass_context
+@cli_options.OPTION_ENV
+@cli_options.OPTION_LOG
+@cli_options.OPTION_VERBOSITY
+@click.option('--from', '-f', 'from_', type=click.DateTime(['%Y-%m-%d']),
+              help='Harvest records from a given date (YYYY-MM-DD)')
+@click.option('--until', '-u', type=click.DateTime(['%Y-%m-%d']),
+              help='Harvest records until a given date (YYYY-MM-DD)')
+@click.option('--directory', '-d',
+              type=click.Path(file_okay=False, writable=True),
+              help='Output directory to save records')
+def harvest(ctx, directory, env, from_, until, log, verbosity=None):
+    """harvest OSCAR records"""
+
+    if directory is None:
+        raise click.ClickException('--directory/-d not specified')
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    o = get_client(ctx, env=env)
+
+    click.echo('Harvesting records')
+    if from_ is not None:
+        from_ = from_.date()
+    if until is not None:
+        until = until.date()
+
+    for identifier, record in o.harvest_records(from_, until):
+        filename = os.path.join(directory, f'{identifier}.xml')
+        click.echo(f'saving to {filename}')
+        etree.ElementTree(record).write(filename)
+
+
+cli.add_command(contact)
+cli.add_command(harvest)
+cli.add_command(station)
+cli.add_command(station_reports)
+cli.add_command(stations)
+cli.add_command(upload)
@@ -27,8 +27,14 @@
 #
 # =================================================================
 
+import logging
+
 import click
 
+OPTION_CONCURRENCY = click.option(
+    '--concurrency', type=click.IntRange(min=1), default=8,
+    help='Maximum number of concurrent requests (default=8)')
+
 OPTION_COUNTRY = click.option('--country', '-c', help='Country')
 
 OPTION_ENV = click.option(
@@ -41,7 +47,30 @@ OPTION_LOG = click.option(
     '--log', '-l', type=click.File('a', encoding='utf-8'),
     help='Name of output file')
 
+
+def configure_logging(ctx, param, value):
+    """
+    Callback to set up logging once from the --verbosity option
+
+    :param ctx: `click.Context` of command
+    :param param: `click.Parameter` of option
+    :param value: `str` of logging level
+
+    :returns: `str` of logging level
+    """
+
+    if value is not None:
+        logging.basicConfig(level=getattr(logging, value))
+    else:
+        logger = logging.getLogger('pyoscar')
+        if not logger.handlers:
+            logger.addHandler(logging.NullHandler())
+
+    return value
+
+
 OPTION_VERBOSITY = click.option(
     '--verbosity', '-v',
     type=click.Choice(['ERROR', 'WARNING', 'INFO', 'DEBUG']),
+    callback=configure_logging,
     help='Verbosity')
@@ -118,7 +118,7 @@ setup(
     include_package_data=True,
     entry_points={
         'console_scripts': [
-            'pyoscar=pyoscar:cli'
+            'pyoscar=pyoscar.cli:cli'
         ]
     },
     classifiers=[
@@ -23,24 +23,47 @@
 #
 ###############################################################################
 
+from datetime import date
 import json
 import io
 import os
 import unittest
+from unittest import mock
+from unittest.mock import patch
 
+from click.testing import CliRunner
 from lxml import etree
 
-from pyoscar import OSCARClient, get_typed_value, get_xpath
-
-try:
-    from unittest import mock
-    from unittest.mock import patch
-except ImportError:
-    from mock import patch
-    import mock
+from pyoscar import (OSCARClient, get_resumption_token, get_typed_value,
+                     get_xpath)
+from pyoscar.cli import cli
 
 THISDIR = os.path.dirname(os.path.realpath(__file__))
 
+FIXTURES = (
+    'test.all_stations_names.json',
+    'test.harvest-page1.xml',
+    'test.harvest-page2.xml',
+    'test.station-wigos.json',
+    'test.station.json',
+    'test.station.xml',
+    'test.upload_error.html',
+    'test.upload_success.json'
+)
+
+# read-only tree shared by XPath tests
+XPATH_TREE = etree.fromstring('''<root>
+    <person department="monitoring">
+        <firstname>John</firstname>
+        <lastname>A</lastname>
+    </person>
+    <person department="prediction">
+        <firstname>Bob</firstname>
+        <lastname>B</lastname>
+    </person>
+</root>
+''')
+
 
 def read(filename, encoding='utf-8'):
     """read file contents"""
@@ -53,15 +76,36 @@ def read(filename, encoding='utf-8'):
 class OSCARTest(unittest.TestCase):
     """Test case for package pyoscar"""
 
-    @patch('pyoscar.requests.get')
+    @classmethod
+    def setUpClass(cls):
+        """read test fixtures and set up a client once for all tests"""
+
+        cls.fixtures = {}
+        for fixture in FIXTURES:
+            with open(get_abspath(fixture), 'rb') as fh:
+                cls.fixtures[fixture] = fh.read()
+
+        # shared by tests that do not depend on the response cache
+        cls.client = OSCARClient()
+
+        # read-only, shared by tests that only query the record
+        cls.station_xml = etree.parse(
+            io.BytesIO(cls.fixtures['test.station.xml']))
+
+    @classmethod
+    def tearDownClass(cls):
+        """close the shared client"""
+
+        cls.client.close()
+
+    @patch('pyoscar.requests.Session.get')
     def itest_stations(self, mock_get):
         """test listing of all stations"""
 
         mock_response = mock.Mock()
         mock_response.ok = True
 
-        with open(get_abspath('test.all_stations_names.json')) as ff:
-            mock_response.json.return_value = json.load(ff)
+        mock_response.content = self.fixtures['test.all_stations_names.json']
 
         mock_get.return_value = mock_response
 
@@ -70,21 +114,46 @@ class OSCARTest(unittest.TestCase):
         self.assertIsInstance(stations, list)
         self.assertEqual(stations[0], 'A12-CPP')
 
-    @patch('pyoscar.requests.get')
+    @patch('pyoscar.requests.Session.close')
+    def test_context_manager(self, mock_close):
+        """test client as context manager"""
+
+        with OSCARClient() as o:
+            self.assertIsInstance(o, OSCARClient)
+
+        mock_close.assert_called_once()
+
+    def test_shared(self):
+        """test process-wide shared clients"""
+
+        o = OSCARClient.shared(env='depl')
+        self.assertIs(OSCARClient.shared(env='depl'), o)
+        self.assertIs(OSCARClient.shared('depl', None, 30), o)
+        self.assertIsNot(OSCARClient.shared(env='prod'), o)
+
+    def test_get_stations_invalid_station_type(self):
+        """test station type validation"""
+
+        o = self.client
+        with self.assertRaises(ValueError):
+            o.get_stations(station_type='foo')
+
+    @patch('pyoscar.requests.Session.get')
     def test_get_station_report(self, mock_get):
         """test single station report"""
 
         mock_response = mock.Mock()
         mock_response.ok = True
 
-        with open(get_abspath('test.station-wigos.json')) as ff:
-            sel0 = json.load(ff)
-        with open(get_abspath('test.station.json')) as ff:
-            sel1 = json.load(ff)
+        sel0 = self.fixtures['test.station-wigos.json']
+        sel1 = self.fixtures['test.station.json']
 
         fake_responses = [mock.Mock(), mock.Mock()]
-        fake_responses[0].json.return_value = sel0
-        fake_responses[1].json.return_value = sel1
+        fake_responses[0].content = sel0
+        fake_responses[1].content = sel1
+        for fake_response in fake_responses:
+            fake_response.status_code = 200
+            fake_response.headers = {}
 
         mock_get.side_effect = fake_responses
 
@@ -94,10 +163,34 @@ class OSCARTest(unittest.TestCase):
         self.assertEqual(station['name'], 'SYDNEY CS, NS')
         self.assertEqual(station['wmoIndex'], '0-20000-0-71758')
 
+        # WIGOS identifier is resolved once per client
+        o.cache_ttl = 0
+        mock_get.side_effect = [fake_responses[1]]
+        station = o.get_station_report('0-20000-0-71758')
+        self.assertEqual(station['name'], 'SYDNEY CS, NS')
+        # no validators were stored, so the refetch is unconditional
+        self.assertEqual(mock_get.call_args.kwargs['headers'], {})
+
+        # station report is served from the cache
+        o.cache_ttl = 60
+        mock_get.reset_mock()
+        station = o.get_station_report('0-20000-0-71758')
+        self.assertEqual(station['name'], 'SYDNEY CS, NS')
+        mock_get.assert_not_called()
+
+        # WMDR XML is parsed from the streamed response
+        mock_response.raw = io.BytesIO(self.fixtures['test.station.xml'])
+        mock_get.side_effect = [mock_response]
+        station = o.get_station_report('0-20000-0-71758', format_='XML')
+        self.assertEqual(etree.QName(station).localname,
+                         'WIGOSMetadataRecord')
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+        mock_response.close.assert_called_once()
+
         mock_response = mock.Mock()
         mock_response.ok = False
         mock_response.status_code = 200
-        mock_response.json.return_value = {}
+        mock_response.content = b'{}'
 
         mock_get.side_effect = [mock_response]
 
@@ -106,14 +199,109 @@ class OSCARTest(unittest.TestCase):
             self.assertIsInstance(station, dict)
             self.assertEqual(len(station), 0)
 
-    def test_get_station_report_summary(self):
-        """test single station report in summary mode"""
+    @patch('pyoscar.OSCARClient.get_station_report')
+    def test_cli_station(self, mock_report):
+        """test station command"""
+
+        mock_report.return_value = {'station_name': 'SYDNEY CS, NS'}
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ['station', '0-20000-0-71151',
+                                     '--summary', '--format=XML'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(json.loads(result.output), mock_report.return_value)
+        mock_report.assert_called_once_with('0-20000-0-71151', True, 'XML')
+
+    @patch('pyoscar.OSCARClient.get_station_report')
+    def test_get_station_reports(self, mock_report):
+        """test multiple station reports"""
+
+        mock_report.side_effect = lambda identifier, *args: {
+            'wmoIndex': identifier}
+
+        identifiers = ['0-20000-0-71758', '0-20000-0-71151', '0-20008-0-GSF']
+
+        o = self.client
+        reports = o.get_station_reports(identifiers, summary=True)
+        self.assertEqual([r['wmoIndex'] for r in reports], identifiers)
+        mock_report.assert_any_call('0-20008-0-GSF', True, 'JSON')
+
+    @patch('pyoscar.requests.Session.get')
+    def test_get_contact(self, mock_get):
+        """test contact search"""
+
+        contacts = [
+            {'id': 1, 'countryName': 'Canada', 'surname': 'Smith',
+             'organization': 'MSC'},
+            {'id': 2, 'countryName': 'France', 'surname': 'Martin',
+             'organization': 'Meteo-France'},
+            {'id': 3, 'countryName': 'Canada', 'surname': 'Jones',
+             'organization': 'MSC'}
+        ]
+
+        def fake_get(url, *args, **kwargs):
+            mock_response = mock.Mock()
+            if url.endswith('/contacts'):
+                mock_response.content = json.dumps(contacts).encode()
+            else:
+                id_ = int(url.split('/')[-1])
+                mock_response.content = json.dumps({'id': id_}).encode()
+            return mock_response
+
+        mock_get.side_effect = fake_get
 
         o = OSCARClient()
+        matches = o.get_contact('canada', None, None)
+        self.assertEqual(matches, [{'id': 1}, {'id': 3}])
+
+        mock_get.reset_mock()
+        matches = o.get_contact('Canada', 'smith', 'MSC')
+        self.assertEqual(matches, [{'id': 1}, {'id': 3}])
+        # contact listing is served from the cache
+        self.assertEqual(mock_get.call_count, 2)
 
-        data_xml = etree.parse(get_abspath('test.station.xml'))
+        mock_get.reset_mock()
+        matches = o.get_contact(None, 'martin', None, detailed=False)
+        self.assertEqual(matches, [contacts[1]])
+        mock_get.assert_not_called()
 
-        summary = o.get_station_report_summary(data_xml)
+    @patch('pyoscar.requests.Session.get')
+    def test_cached_get(self, mock_get):
+        """test response cache revalidation and eviction"""
+
+        mock_response = mock.Mock()
+        mock_response.status_code = 200
+        mock_response.ok = True
+        mock_response.content = b'[]'
+        mock_response.headers = {'ETag': '"v1"'}
+
+        mock_get.return_value = mock_response
+
+        o = OSCARClient(cache_size=1)
+        self.assertEqual(o._cached_get('https://example.org/a'), b'[]')
+
+        # stale entries are revalidated with the stored ETag
+        o._cache[('https://example.org/a', frozenset())] = (
+            -o.cache_ttl, b'[]', '"v1"', None)
+        mock_response.status_code = 304
+        mock_response.content = b''
+        self.assertEqual(o._cached_get('https://example.org/a'), b'[]')
+        self.assertEqual(mock_get.call_args.kwargs['headers'],
+                         {'If-None-Match': '"v1"'})
+
+        # least recently used entries are evicted
+        mock_response.status_code = 200
+        mock_response.content = b'{}'
+        o._cached_get('https://example.org/b')
+        self.assertEqual(list(o._cache), [('https://example.org/b',
+                                           frozenset())])
+
+    def test_get_station_report_summary(self):
+        """test single station report in summary mode"""
+
+        o = self.client
+
+        summary = o.get_station_report_summary(self.station_xml)
 
         keys = [
             'barometer_height',
@@ -128,8 +316,52 @@ class OSCARTest(unittest.TestCase):
         ]
 
         self.assertEqual(sorted(summary.keys()), keys)
+        self.assertEqual(summary['station_name'], 'ENAROTALI')
+        self.assertEqual(summary['wigos_station_identifier'],
+                         '0-20000-0-97780')
+        self.assertEqual(summary['facility_type'], 'landFixed')
+        self.assertEqual(summary['latitude'], -3.926791)
+        self.assertEqual(summary['barometer_height'], 1770.0)
 
-    @patch('pyoscar.requests.post')
+    @patch('pyoscar.requests.Session.get')
+    def test_harvest_records(self, mock_get):
+        """test harvesting"""
+
+        fake_responses = [mock.Mock(), mock.Mock()]
+        fake_responses[0].content = self.fixtures['test.harvest-page1.xml']
+        fake_responses[1].content = self.fixtures['test.harvest-page2.xml']
+
+        mock_get.side_effect = fake_responses
+
+        o = self.client
+
+        results = []
+        for identifier, record in o.harvest_records():
+            results.append((identifier, record.get(
+                '{http://www.opengis.net/gml/3.2}id')))
+
+        self.assertEqual(results, [
+            ('0-20000-0-71758', 'id1'),
+            ('0-20000-0-71151', 'id2'),
+            ('0-20008-0-GSF', 'id3')
+        ])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args.kwargs['params'], {
+            'verb': 'ListRecords',
+            'resumptionToken': 'token1'
+        })
+
+        # records modified within a given date range
+        mock_get.side_effect = [fake_responses[1]]
+        list(o.harvest_records(date(2024, 1, 1), date(2024, 2, 1)))
+        self.assertEqual(mock_get.call_args.kwargs['params'], {
+            'verb': 'ListRecords',
+            'metadataPrefix': 'wmdr',
+            'from': '2024-01-01',
+            'until': '2024-02-01'
+        })
+
+    @patch('pyoscar.requests.Session.post')
     def test_upload(self, mock_post):
         """test upload"""
 
@@ -138,10 +370,9 @@ class OSCARTest(unittest.TestCase):
         mock_post.return_value = mock_response
         mock_response.status_code = 200
 
-        with open(get_abspath('test.upload_success.json')) as fh:
-            mock_response.json.return_value = json.load(fh)
+        mock_response.content = self.fixtures['test.upload_success.json']
 
-        o = OSCARClient()
+        o = self.client
         result = o.upload('<foo/>')
         self.assertIsInstance(result, dict)
         self.assertEqual(result['id'], 67610)
@@ -152,30 +383,35 @@ class OSCARTest(unittest.TestCase):
         mock_post.return_value = mock_response
         mock_response.status_code = 401
 
-        with open(get_abspath('test.upload_error.html')) as fh:
-            mock_response.text = fh.read()
+        mock_response.content = self.fixtures['test.upload_error.html']
 
-        o = OSCARClient()
         result = o.upload('<foo/>')
         self.assertIsInstance(result, dict)
         self.assertEqual(result['code'], 401)
+        self.assertIn('Permission denied', result['description'])
+
+        # test error handling of an unexpected error page
+        mock_response.status_code = 502
+        mock_response.content = b'<html><body>Bad Gateway</body></html>'
+        mock_response.text = mock_response.content.decode()
+
+        result = o.upload('<foo/>')
+        self.assertEqual(result['code'], 502)
+        self.assertIn('Bad Gateway', result['description'])
+
+        # test error handling of a blank error page
+        mock_response.status_code = 500
+        mock_response.content = b'  \n'
+        mock_response.text = mock_response.content.decode()
+
+        result = o.upload('<foo/>')
+        self.assertEqual(result['code'], 500)
+        self.assertEqual(result['description'], '  \n')
 
     def test_get_xpath(self):
         """test get_xpath"""
 
-        data = '''<root>
-            <person department="monitoring">
-                <firstname>John</firstname>
-                <lastname>A</lastname>
-            </person>
-            <person department="prediction">
-                <firstname>Bob</firstname>
-                <lastname>B</lastname>
-            </person>
-        </root>
-        '''
-
-        data = etree.fromstring(data)
+        data = XPATH_TREE
 
         person1 = get_xpath(data, '//person/firstname')
         self.assertIsInstance(person1, str)
@@ -189,13 +425,59 @@ class OSCARTest(unittest.TestCase):
         self.assertIsInstance(persons, list)
         self.assertEqual(len(persons), 2)
 
+    def test_get_resumption_token(self):
+        """test get_resumption_token"""
+
+        page1 = self.fixtures['test.harvest-page1.xml']
+        page2 = self.fixtures['test.harvest-page2.xml']
+
+        self.assertEqual(get_resumption_token(page1), 'token1')
+        self.assertIsNone(get_resumption_token(page2))
+
+        template = ('<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">'
+                    '<ListRecords><resumptionToken>{}</resumptionToken>'
+                    '</ListRecords></OAI-PMH>')
+
+        tokens = [
+            ('a&amp;b', 'a&b'),
+            ('a&#38;b&quot;c', 'a&b"c'),
+            ('<![CDATA[a&b]]>', 'a&b')
+        ]
+
+        for token, expected in tokens:
+            with self.subTest(token=token):
+                content = template.format(token).encode()
+                self.assertEqual(get_resumption_token(content), expected)
+
+        # an empty token marks the last page
+        content = template.replace(
+            '<resumptionToken>{}</resumptionToken>',
+            '<resumptionToken completeListSize="2" cursor="1"/>').encode()
+        self.assertIsNone(get_resumption_token(content))
+
+        content = ('<oai:OAI-PMH xmlns:oai="http://www.openarchives.org/OAI/'
+                   '2.0/"><oai:ListRecords><oai:resumptionToken>a&amp;b'
+                   '</oai:resumptionToken></oai:ListRecords></oai:OAI-PMH>')
+        self.assertEqual(get_resumption_token(content.encode()), 'a&b')
+
     def test_get_typed_value(self):
         """test get_typed_value"""
 
-        self.assertIsInstance(get_typed_value('1'), int)
-        self.assertIsInstance(get_typed_value('1.2'), float)
-        self.assertIsInstance(get_typed_value('1.2.0'), str)
-        self.assertIsInstance(get_typed_value('foo'), str)
+        values = [
+            ('1', 1),
+            ('1.2', 1.2),
+            ('1.2.0', '1.2.0'),
+            ('foo', 'foo'),
+            ('-33.86', -33.86),
+            ('0123', '0123'),
+            (5, 5)
+        ]
+
+        for value, expected in values:
+            with self.subTest(value=value):
+                result = get_typed_value(value)
+                self.assertIsInstance(result, type(expected))
+                self.assertEqual(result, expected)
 
 
 def get_abspath(filepath):